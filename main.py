@@ -1,7 +1,6 @@
 import sys
-from collections import defaultdict
 from service.lexer import Lexer
-from service.token import TYPE_CN
+from service.token import TokenType, TYPE_CN
 
 def main(path: str):
     with open(path, "r", encoding="utf-8") as f:
@@ -9,16 +8,12 @@ def main(path: str):
 
     tokens = Lexer(src).tokenize()
 
-    by_line = defaultdict(list)
-    for t in tokens:
-        by_line[t.line].append(t)
-
-    max_line = src.count("\n") + 1
-    for ln in range(1, max_line + 1):
-        if ln not in by_line:
-            continue
-        for t in by_line[ln]:
-            print(f"({t.line}, {TYPE_CN.get(t.type, t.type.name)}, {t.lexeme})")
+    # 记号已按源码顺序（即行号递增）生成，直接按列读取后整体拼接一次写出
+    names = {t.value: TYPE_CN.get(t, t.name) for t in TokenType}
+    lines = [f"({ln}, {names[v]}, {src[s:e]})"
+             for v, s, e, ln in zip(tokens.types, tokens.starts, tokens.ends, tokens.lines)]
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -1,47 +1,50 @@
-from .token import Token, TokenType
+from bisect import bisect_left
+from .token import Token, TokenType, TokenArray
 from .token import KEYWORDS, OPERATORS, DELIMITERS
 from .matcher import (
-    match_whitespace, match_identifier,
-    match_float, match_hex_int, match_oct_int, match_dec_int,
-    match_string_or_char, Trie, is_id_continue
+    match_identifier, match_number,
+    match_string_or_char, match_run, CharMap, Trie, ID_CONT_TABLE
 )
 
+# 运算符/界符表是固定的，所有 Lexer 共用这棵只读 Trie（与 _DISPATCH 一起在导入时确定）；
+# 标签直接存记号类型
+_TRIE = Trie()
+for _op in OPERATORS:
+    _TRIE.add(_op, TokenType.OP)
+for _op in DELIMITERS:
+    _TRIE.add(_op, TokenType.DL)
+
+_KW_MAXLEN = max(map(len, KEYWORDS))
+
+# 位置 -> (换行索引, 行, 列)；nl 为所有换行符位置，ln 为上次所在行的换行索引。
+# 记号按位置递增生成，只有跨出缓存行时才二分
+def _line_col(nl, ln, pos: int):
+    if (ln < len(nl) and nl[ln] < pos) or (ln and nl[ln-1] >= pos):
+        ln = bisect_left(nl, pos)
+    return ln, ln + 1, (pos - nl[ln-1] if ln else pos + 1)
+
 class Lexer:
+    __slots__ = ("text", "n", "pos", "cm", "_nl", "_ln")
+
     def __init__(self, text: str):
         self.text = text
         self.n = len(text)
         self.pos = 0
-        self.line = 1
-        self.col = 1
-        
-        self.trie = Trie()
-        for op in OPERATORS:
-            self.trie.add(op, "OP")
-        for dl in DELIMITERS:
-            self.trie.add(dl, "DL")
-
-    # 推进
-    def _advance(self, s: str):
-        for ch in s:
-            if ch == "\n":
-                self.line += 1
-                self.col = 1
-            else:
-                self.col += 1
-        self.pos += len(s)
+        self.cm = CharMap(text)
+
+        # 所有换行符的位置，行列号在生成记号时二分求得
+        self._nl = []
+        j = text.find("\n")
+        while j != -1:
+            self._nl.append(j)
+            j = text.find("\n", j + 1)
+        self._ln = 0
 
     # 提前看
     def _peek(self, k=1) -> str:
         return self.text[self.pos:self.pos+k]
     
     # 预处理
-    def _skip_ws(self) -> bool:
-        n = match_whitespace(self.text, self.pos)
-        if n > 0:
-            self._advance(self.text[self.pos:self.pos+n])
-            return True
-        return False
-
     def _at_line_start(self) -> bool:
         i = self.pos - 1
         while i >= 0 and self.text[i] in " \t":
@@ -58,183 +61,134 @@ class Lexer:
                 if self.text[j] == "\n":
                     break
                 j += 1
-            self._advance(self.text[self.pos:j])
+            self.pos = j
             return True
         return False
 
-    def _skip_comments(self):
-        # 块注释
-        if self._peek(2) == "/*":
-            end = self.text.find("*/", self.pos + 2)
-            if end == -1:
-                lex = self.text[self.pos:]
-                tok = Token(TokenType.ERROR, lex, self.line, self.col)
-                self._advance(lex)
-                return tok 
-            self._advance(self.text[self.pos:end+2])
-            return True
-        # 单行注释 
-        if self._peek(2) == "//":
-            j = self.text.find("\n", self.pos)
-            if j == -1:
-                self._advance(self.text[self.pos:])
+    # 一次扫描跳过空白与注释；块注释未闭合时返回 (ERROR, 长度)
+    def _skip_trivia(self):
+        t, i, n, ws = self.text, self.pos, self.n, self.cm.ws
+        while i < n:
+            c = t[i]
+            if ws[i]:
+                i += match_run(ws, i)
+            elif c == "/" and i + 1 < n and t[i+1] == "*":
+                # 块注释
+                end = t.find("*/", i + 2)
+                if end == -1:
+                    self.pos = i
+                    return (TokenType.ERROR, n - i)
+                i = end + 2
+            elif c == "/" and i + 1 < n and t[i+1] == "/":
+                # 单行注释
+                j = t.find("\n", i)
+                i = n if j == -1 else j
             else:
-                self._advance(self.text[self.pos:j])
-            return True
-        return False
+                # 预处理行暂不跳过（# 作为界符输出，见 _skip_pp_line）
+                break
+        self.pos = i
+        return None
+
+    # 以下扫描函数都从 self.pos 开始、不推进，返回 (记号类型, 长度)
 
     # 字符串/字符 ——
-    def _try_string_or_char(self):
+    def _scan_string_or_char(self):
         length, is_string, is_error = match_string_or_char(self.text, self.pos)
-        if length == 0:
-            return None
-        ttype = TokenType.CS_STR if is_string else TokenType.CS_CHAR
-        lex = self.text[self.pos:self.pos+length]
         if is_error:
-            tok = Token(TokenType.ERROR, lex, self.line, self.col)
-        else:
-            tok = Token(ttype, lex, self.line, self.col)
-        self._advance(lex)
-        return tok
+            return (TokenType.ERROR, length)
+        return (TokenType.CS_STR if is_string else TokenType.CS_CHAR, length)
+
+    # 预处理指令处理：例如 #include <stdio.h>
+    def _scan_hash(self):
+        return (TokenType.DL, 1)
+
+    # 数字：组合正则一次给出最长匹配及类别
+    def _scan_number(self):
+        text, start, cm = self.text, self.pos, self.cm
+        L, kind = match_number(text, start)
+        ttype = TokenType[kind]
+
+        # 合法数字后后缀检查（012t、0x5BT、123abc、0xg、089 ）
+        j = start + L
+        if j < self.n and ID_CONT_TABLE[cm.raw[j]]:
+            return (TokenType.ERROR, L + match_run(cm.idc, j))
+        return (ttype, L)
+
+    # 标识符/关键字
+    def _scan_ident(self):
+        L = match_identifier(self.cm, self.pos)
+        # 比最长关键字还长的必是标识符，不必切片查表
+        if L <= _KW_MAXLEN and self.text[self.pos:self.pos+L] in KEYWORDS:
+            return (TokenType.RW, L)
+        return (TokenType.ID, L)
+
+    # 运算符/界符（Trie最长匹配）
+    def _scan_op(self):
+        L, ttype = _TRIE.match_longest(self.cm.raw, self.pos)
+        if L == 0:
+            return self._scan_error()
+        return (ttype, L)
+
+    @staticmethod
+    def _scan_error():
+        return (TokenType.ERROR, 1)
+
+    # 跳过空白与注释后识别下一个记号，返回 (记号类型, 长度)，self.pos 停在记号开头
+    def _next(self):
+        err = self._skip_trivia()
+        if err is not None:
+            return err
+
+        if self.pos >= self.n:
+            return (TokenType.EOF, 0)
+
+        # 按首字符分派到对应的扫描函数
+        handler = _DISPATCH[self.cm.raw[self.pos]]
+        if handler is None:
+            return self._scan_error()
+        return handler(self)
 
     # 主接口
     def next_token(self) -> Token:
-        progressed = True
-        while progressed:
-            progressed = False
-            if self._skip_ws():
-                progressed = True
-            cm = self._skip_comments()
-            if cm is True:
-                progressed = True
-            elif isinstance(cm, Token): 
-                return cm
-            # if self._skip_pp_line():
-            #     progressed = True
-
-        if self.pos >= self.n:
-            return Token(TokenType.EOF, "", self.line, self.col)
-
-        # 字符串/字符
-        sc = self._try_string_or_char()
-        if sc is not None:
-            return sc
-        
-        # 预处理指令处理：例如 #include <stdio.h>
-        if self._peek(1) == '#':
-            tok = Token(TokenType.DL, '#', self.line, self.col)
-            self._advance('#')
-            return tok
-
-        # 试所有候选（最长匹配）
-        candidates = []
-
-        # 数字
-        start = self.pos
-        Lf = match_float(self.text, start)
-        if Lf > 0:
-            candidates.append((Lf, TokenType.FLOAT))
-
-        L16 = match_hex_int(self.text, start)
-        if L16 > 0:
-            candidates.append((L16, TokenType.NUM16))
-
-        L8 = match_oct_int(self.text, start)
-        if L8 > 0:
-            candidates.append((L8, TokenType.NUM8))
-
-        L10 = match_dec_int(self.text, start)
-        if L10 > 0:
-            candidates.append((L10, TokenType.NUM10))
-
-        # 运算符/界符（Trie最长匹配）
-        op_lex, op_tag = self.trie.match_longest(self.text, start)
-        if op_lex is not None:
-            ttype = TokenType.OP if op_tag == "OP" else TokenType.DL
-            candidates.append((len(op_lex), ttype))
-
-        # 标识符/关键字
-        Lid = match_identifier(self.text, start)
-        if Lid > 0:
-            candidates.append((Lid, None))
-
-        if not candidates:
-            bad = self.text[self.pos]
-            tok = Token(TokenType.ERROR, bad, self.line, self.col)
-            self._advance(bad)
-            return tok
-
-        # 取最长；若等长，优先级：数字 > OP/DL > ID/RW
-        def pri(entry):
-            l, tt = entry
-            if tt in (TokenType.FLOAT, TokenType.NUM16, TokenType.NUM8, TokenType.NUM10):
-                p = 3
-            elif tt in (TokenType.OP, TokenType.DL):
-                p = 2
-            else:
-                p = 1 
-            return (l, p)
-
-        L, ttype = max(candidates, key=pri)
-        lex = self.text[self.pos:self.pos+L]
-
-        # 以 0 开头的专门判定
-        if ttype == TokenType.NUM10 and lex == '0':
-            j = self.pos + 1
-            if j < self.n and self.text[j] in ('x', 'X'):
-                L16_try = match_hex_int(self.text, self.pos)
-                if L16_try > 0:
-                    L = L16_try
-                    ttype = TokenType.NUM16
-                    lex = self.text[self.pos:self.pos+L]
-                else:
-                    k = j + 1
-                    while k < self.n and is_id_continue(self.text[k]):
-                        k += 1
-                    bad_lex = self.text[self.pos:k] if k > j + 1 else self.text[self.pos:j+1]
-                    tok = Token(TokenType.ERROR, bad_lex, self.line, self.col)
-                    self._advance(bad_lex)
-                    return tok
-            elif j < self.n and self.text[j] in '01234567':
-                L8_try = match_oct_int(self.text, self.pos)
-                if L8_try > 0:
-                    L = L8_try
-                    ttype = TokenType.NUM8
-                    lex = self.text[self.pos:self.pos+L]
-            elif j < self.n and self.text[j] in '89':
-                k = j + 1
-                while k < self.n and is_id_continue(self.text[k]):
-                    k += 1
-                bad_lex = self.text[self.pos:k]
-                tok = Token(TokenType.ERROR, bad_lex, self.line, self.col)
-                self._advance(bad_lex)
-                return tok
-
-        # 合法数字后后缀检查（012t、0x5BT、123abc ）
-        if ttype in (TokenType.FLOAT, TokenType.NUM16, TokenType.NUM8, TokenType.NUM10):
-            j = self.pos + L
-            if j < self.n and is_id_continue(self.text[j]):
-                k = j
-                while k < self.n and is_id_continue(self.text[k]):
-                    k += 1
-                bad_lex = self.text[self.pos:k]
-                tok = Token(TokenType.ERROR, bad_lex, self.line, self.col)
-                self._advance(bad_lex)
-                return tok
-
-        # 若是 ID/RW，判定关键字
-        if ttype is None:
-            ttype = TokenType.RW if lex in KEYWORDS else TokenType.ID
-
-        tok = Token(ttype, lex, self.line, self.col)
-        self._advance(lex)
-        return tok
-
-    def tokenize(self):
-        out = []
+        ttype, L = self._next()
+        pos = self.pos
+        self._ln, line, col = _line_col(self._nl, self._ln, pos)
+        self.pos = pos + L
+        return Token(ttype, self.text, pos, pos + L, line, col)
+
+    # 整体扫描，结果按列存入 TokenArray，不为每个记号创建对象；
+    # 循环内只用局部变量，行号缓存在结束时写回
+    def tokenize(self) -> TokenArray:
+        out = TokenArray(self.text)
+        add_type, add_start, add_end = out.types.append, out.starts.append, out.ends.append
+        add_line, add_col = out.lines.append, out.cols.append
+        nl, ln = self._nl, self._ln
+        scan = self._next
+        EOF = TokenType.EOF
         while True:
-            t = self.next_token()
-            if t.type == TokenType.EOF:
+            ttype, L = scan()
+            if ttype is EOF:
                 break
-            out.append(t)
+            pos = self.pos
+            ln, line, col = _line_col(nl, ln, pos)
+            self.pos = pos + L
+            add_type(ttype.value)
+            add_start(pos)
+            add_end(pos + L)
+            add_line(line)
+            add_col(col)
+        self._ln = ln
         return out
+
+# 首字符分派表（按字节视图索引）
+_DISPATCH = [None] * 256
+for _ch in "0123456789":
+    _DISPATCH[ord(_ch)] = Lexer._scan_number
+for _ch in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_":
+    _DISPATCH[ord(_ch)] = Lexer._scan_ident
+for _op in OPERATORS + DELIMITERS:
+    _DISPATCH[ord(_op[0])] = Lexer._scan_op
+_DISPATCH[ord("'")] = Lexer._scan_string_or_char
+_DISPATCH[ord('"')] = Lexer._scan_string_or_char
+_DISPATCH[ord('#')] = Lexer._scan_hash
+del _ch, _op
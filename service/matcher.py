@@ -1,158 +1,162 @@
+import codecs
+import re
 from typing import Optional, Tuple
 
-WHITESPACE = set(" \t\r\n\f\v")
-
-# 识别单个字符
-def is_alpha(c: str) -> bool:
-    return ('a' <= c <= 'z') or ('A' <= c <= 'Z')
-
-def is_digit(c: str) -> bool:
-    return '0' <= c <= '9'
-
-def is_hex(c: str) -> bool:
-    return is_digit(c) or ('a' <= c <= 'f') or ('A' <= c <= 'F')
-
-def is_oct(c: str) -> bool:
-    return '0' <= c <= '7'
-
-def is_id_start(c: str) -> bool:
-    return is_alpha(c) or c == '_'
-
-def is_id_continue(c: str) -> bool:
-    return is_id_start(c) or is_digit(c)
-
-def match_while(text: str, pos: int, pred) -> int:
-    i, n = pos, len(text)
-    while i < n and pred(text[i]):
-        i += 1
-    return i - pos
-
-# 跳过空白符
-def match_whitespace(text: str, pos: int) -> int:
-    return match_while(text, pos, lambda ch: ch in WHITESPACE)
+WHITESPACE = " \t\r\n\f\v"
+
+# 字符分类表（256 项，按 ord 索引，类内为 1）
+def _make_table(chars: str) -> bytes:
+    t = bytearray(256)
+    for ch in chars:
+        t[ord(ch)] = 1
+    return bytes(t)
+
+_LOWER = "abcdefghijklmnopqrstuvwxyz"
+_UPPER = _LOWER.upper()
+_DIGITS = "0123456789"
+
+WS_TABLE = _make_table(WHITESPACE)
+ID_START_TABLE = _make_table(_LOWER + _UPPER + "_")
+ID_CONT_TABLE = _make_table(_LOWER + _UPPER + "_" + _DIGITS)
+
+# 编码字节视图时把非 latin-1 字符替换为 NUL（不属于任何字符类，也不是运算符）
+codecs.register_error("lexer_c.nul", lambda e: ("\0" * (e.end - e.start), e.end))
+
+# 字符类伴随串：源文本每个字符映射为 1（类内）或 0（类外），
+# 与源文本按下标一一对应，一次 find 即可跳过整段同类字符
+class CharMap:
+    __slots__ = ("raw", "ws", "idc")
+
+    def __init__(self, text: str):
+        # 非 latin-1 字符逐个替换为 NUL，保证下标对齐；
+        # raw 同时作为源文本的字节视图，扫描时按整数比较
+        raw = text.encode("latin-1", "lexer_c.nul")
+        self.raw = raw
+        self.ws = raw.translate(WS_TABLE)
+        self.idc = raw.translate(ID_CONT_TABLE)
+
+# 在伴随串上跳过一段类内字符，返回长度
+def match_run(cmap: bytes, pos: int) -> int:
+    end = cmap.find(0, pos)
+    if end < 0:
+        end = len(cmap)
+    return end - pos
 
 # 匹配标识符
-def match_identifier(text: str, pos: int) -> int:
-    n = len(text)
-    if pos >= n or not is_id_start(text[pos]):
-        return 0
-    i = pos + 1
-    while i < n and is_id_continue(text[i]):
-        i += 1
-    return i - pos
-
-# 匹配浮点数（十进制）
-def match_float(text: str, pos: int) -> int:
-    n = len(text)
-    i = pos
-
-    if i >= n or not is_digit(text[i]):
-        return 0
-
-    i += match_while(text, i, is_digit)
-
-    if i >= n or text[i] != '.':
-        return 0
-    i += 1
-
-    if i >= n or not is_digit(text[i]):
-        return 0
-    i += match_while(text, i, is_digit)
-
-    if i < n and text[i] in ('e', 'E'):
-        j = i + 1
-        if j < n and text[j] in ('+', '-'):
-            j += 1
-        k = j + match_while(text, j, is_digit)
-        if k == j:
-            return 0  
-        i = k
-
-    return i - pos
-
-# 匹配16进制
-def match_hex_int(text: str, pos: int) -> int:
-    n = len(text)
-    if pos + 1 < n and text[pos] == '0' and text[pos + 1] in ('x', 'X'):
-        j = pos + 2
-        if j < n and is_hex(text[j]):
-            while j < n and is_hex(text[j]):
-                j += 1
-            return j - pos
+def match_identifier(cm: CharMap, pos: int) -> int:
+    raw = cm.raw
+    if pos >= len(raw) or not ID_START_TABLE[raw[pos]]:
         return 0
-    return 0
-
-# 匹配8进制
-def match_oct_int(text: str, pos: int) -> int:
-    n = len(text)
-    if pos < n and text[pos] == '0':
-        j = pos + 1
-        if j < n and is_oct(text[j]):
-            while j < n and is_oct(text[j]):
-                j += 1
-            return j - pos
-    return 0
-
-# 匹配10进制
-def match_dec_int(text: str, pos: int) -> int:
-    n = len(text)
-    if pos >= n or not is_digit(text[pos]):
-        return 0
-    if text[pos] == '0':
-        return 1
-    j = pos + 1
-    j += match_while(text, j, is_digit)
-    return j - pos
-
-# 匹配字符或字符串
+    return 1 + match_run(cm.idc, pos + 1)
+
+# 数字组合正则：一次匹配给出最长的数字及其类别（组名即 TokenType 名），
+# 优先级：浮点 > 十六进制 > 八进制 > 十进制；
+# 浮点的指数部分若无数字则整体不算浮点
+_NUM_RE = re.compile(
+    r"(?P<FLOAT>[0-9]+\.[0-9]+(?:[eE][+-]?[0-9]+|(?![0-9eE])))"
+    r"|(?P<NUM16>0[xX][0-9a-fA-F]+)"
+    r"|(?P<NUM8>0[0-7]+)"
+    r"|(?P<NUM10>0|[1-9][0-9]*)"
+)
+
+# 匹配数字，返回 (长度, 类别名)，未命中为 (0, None)
+def match_number(text: str, pos: int) -> Tuple[int, Optional[str]]:
+    m = _NUM_RE.match(text, pos)
+    if m is None:
+        return (0, None)
+    return (m.end() - pos, m.lastgroup)
+
+# 匹配字符或字符串：用 find 直接定位结束引号、换行与转义，
+# 只在遇到反斜杠时才继续循环
 def match_string_or_char(text: str, pos: int) -> Tuple[int, bool, bool]:
     n = len(text)
     if pos >= n or text[pos] not in ("'", '"'):
         return (0, False, False)
     quote = text[pos]
+    is_string = quote == '"'
     i = pos + 1
-    while i < n:
-        c = text[i]
+    q = nl = -1
+    while True:
+        if q < i:
+            q = text.find(quote, i)
+            if q < 0:
+                q = n
+        stop = q
+        # 字符串不能跨行
+        if is_string:
+            if nl < i:
+                nl = text.find('\n', i)
+                if nl < 0:
+                    nl = n
+            stop = min(q, nl)
         # 跳过转义
-        if c == '\\':
-            i += 2  
-            continue
-        if c == quote:
-            return (i - pos + 1, quote == '"', False)
-        if c == '\n' and quote == '"':
+        bs = text.find('\\', i, stop)
+        if bs < 0:
             break
-        i += 1
+        i = bs + 2
+    if stop == q and q < n:
+        return (q - pos + 1, is_string, False)
     # 未闭合
-    return (max(1, i - pos), quote == '"', True)
+    return (max(1, stop - pos), is_string, True)
 
-# 运算符/界符的最长匹配
+# 运算符/界符的最长匹配：先按 Trie 收集，再编译成整数转移表的 DFA
+# trans[state][byte] -> 下一状态（0 表示无转移，根状态不会作为目标）
 class Trie:
     def __init__(self):
         self.root = {"next": {}}
+        self._trans = None
+        self._tags = None
 
-    def add(self, s: str, tag: str):
+    # 匹配在 latin-1 字节视图上进行，NUL 也用来代替非 latin-1 字符，
+    # 所以只接受 U+0001..U+00FF 的字符
+    def add(self, s: str, tag):
+        for ch in s:
+            if not 0 < ord(ch) < 256:
+                raise ValueError(f"Trie 只支持 U+0001..U+00FF 的字符: {ch!r}")
         node = self.root
         for ch in s:
             node = node["next"].setdefault(ch, {"next": {}})
         node["end"] = True
         node["tag"] = tag
-
-    def match_longest(self, text: str, pos: int):
-        node = self.root
-        i, n = pos, len(text)
-        last_hit = None 
+        self._trans = None
+
+    # BFS 为每个结点分配状态号，生成转移表与终态标记
+    def _compile(self):
+        nodes = [self.root]
+        ids = {id(self.root): 0}
+        k = 0
+        while k < len(nodes):
+            for nxt in nodes[k]["next"].values():
+                ids[id(nxt)] = len(nodes)
+                nodes.append(nxt)
+            k += 1
+
+        trans, tags = [], []
+        for node in nodes:
+            row = [0] * 256
+            for ch, nxt in node["next"].items():
+                row[ord(ch)] = ids[id(nxt)]
+            trans.append(row)
+            tags.append(node.get("tag") if node.get("end") else None)
+        self._trans = trans
+        self._tags = tags
+
+    # 在字节视图上做最长匹配，返回 (长度, 标签)，未命中为 (0, None)
+    def match_longest(self, raw: bytes, pos: int):
+        if self._trans is None:
+            self._compile()
+        trans, tags = self._trans, self._tags
+        i, n = pos, len(raw)
+        state = 0
+        last_len, last_tag = 0, None
 
         while i < n:
-            ch = text[i]
-            nxt = node["next"].get(ch)
-            if nxt is None:
+            state = trans[state][raw[i]]
+            if not state:
                 break
-            node = nxt
             i += 1
-            if node.get("end"):
-                last_hit = (i, node.get("tag"))
+            tag = tags[state]
+            if tag is not None:
+                last_len, last_tag = i - pos, tag
 
-        if last_hit is None:
-            return (None, None)
-        end_i, tag = last_hit
-        return (text[pos:end_i], tag)
+        return (last_len, last_tag)
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from array import array
 from enum import Enum, auto
 import re
 
@@ -32,29 +32,84 @@ TYPE_CN = {
     TokenType.ERROR: "错误",
 }
 
-@dataclass
+# 记号只保存在源文本中的起止下标，词素在访问时才切片
 class Token:
-    type: TokenType
-    lexeme: str
-    line: int
-    col: int
+    __slots__ = ("type", "start", "end", "line", "col", "_text")
+
+    def __init__(self, type: TokenType, text: str, start: int, end: int, line: int, col: int):
+        self.type = type
+        self._text = text
+        self.start = start
+        self.end = end
+        self.line = line
+        self.col = col
+
+    @property
+    def lexeme(self) -> str:
+        return self._text[self.start:self.end]
+
+    # 与原 dataclass 一致：按 (类型, 词素, 行, 列) 比较，可变对象不可哈希
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.type, self.lexeme, self.line, self.col) == \
+               (other.type, other.lexeme, other.line, other.col)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Token(type={self.type}, lexeme={self.lexeme!r}, line={self.line}, col={self.col})"
+
+# 记号序列的列式存储：每个字段一列定长整数数组，
+# 按下标或迭代访问时才生成 Token
+class TokenArray:
+    __slots__ = ("text", "types", "starts", "ends", "lines", "cols")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.types = array("B")     # TokenType 的 value
+        self.starts = array("i")
+        self.ends = array("i")
+        self.lines = array("i")
+        self.cols = array("i")
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    # 整数下标返回 Token，切片返回新的 TokenArray
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            out = TokenArray(self.text)
+            out.types = self.types[k]
+            out.starts = self.starts[k]
+            out.ends = self.ends[k]
+            out.lines = self.lines[k]
+            out.cols = self.cols[k]
+            return out
+        return Token(TokenType(self.types[k]), self.text, self.starts[k], self.ends[k],
+                     self.lines[k], self.cols[k])
+
+    def __iter__(self):
+        text = self.text
+        for v, s, e, ln, col in zip(self.types, self.starts, self.ends, self.lines, self.cols):
+            yield Token(TokenType(v), text, s, e, ln, col)
 
 # 关键字(c89/c90标准)
-KEYWORDS = {
+KEYWORDS = frozenset({
     "auto","double","int","struct","break","else","long","switch","case","enum",
     "register","typedef","char","extern","return","union","const","float","short",
     "unsigned","continue","for","signed","void","default","goto","sizeof","volatile",
     "do","if","static","while","printf","include"
-}
+})
 
 # 运算符（按长度降序确保最长匹配）
-OPERATORS = [
+OPERATORS = (
     ">>=", "<<=", "==", "!=", ">=", "<=",
     "++", "--", "&&", "||",
     "+=", "-=", "*=", "/=", "%=", "&=", "|=", "^=",
     "<<", ">>", "->",
     ".", "+","-","*","/","%","&","|","^","~","!","=","<",">","?"
-]
+)
 
 # 界符
-DELIMITERS = ["...", "(", ")", "[", "]", "{", "}", ";", ",", ":","<",">"]
+DELIMITERS = ("...", "(", ")", "[", "]", "{", "}", ";", ",", ":","<",">")